@@ -1,15 +1,28 @@
 import os
+import re
 import h5py
+import shutil
+import tempfile
+import json
+import hashlib
+import http.client
+import urllib.error
 import urllib.request
 
 from abc import ABC, abstractmethod
 from gym import Env
 import numpy as np
 from tqdm import tqdm
-from emei.offline_info import URL_INFOS
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from emei.offline_info import URL_INFOS, DATASET_NAMES
 
 DATASET_PATH = os.path.expanduser('~/.emei/offline_data')
+H5_CHUNK_CACHE_BYTES = 128 * 1024 * 1024
+H5_METADATA_CACHE_BYTES = 128 * 1024 * 1024
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_BLOCK_BYTES = 1024 * 1024
+DOWNLOAD_RETRIES = 3
+DIGEST_SUFFIX = ".blake2b"
 
 
 class EmeiEnv(ABC, Env):
@@ -21,13 +34,8 @@ class EmeiEnv(ABC, Env):
         self.frozen_state = None
         # for downloadable
         env_name = self.__class__.__name__[:-3]
-        self.offline_dataset_names = []
-        if env_name in URL_INFOS:
-            self.data_url = URL_INFOS[env_name]
-            self.offline_dataset_names = []
-            for param in self.data_url:
-                for dataset in self.data_url[param]:
-                    self.offline_dataset_names.append("{}-{}".format(param, dataset))
+        self.data_url = URL_INFOS.get(env_name, {})
+        self.offline_dataset_names = DATASET_NAMES.get(env_name, [])
 
     @abstractmethod
     def freeze(self):
@@ -54,6 +62,18 @@ class EmeiEnv(ABC, Env):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def _transition(self, action):
+        """
+        Roll the dynamics forward by one step from current state, without reward and terminal.
+        :param action: single action
+        :return: single next-observation
+        """
+        raise NotImplementedError
+
+    def _get_info(self):
+        return {}
+
     def single_query(self, obs, action):
         self.freeze()
         self._set_state_by_obs(obs)
@@ -66,58 +86,84 @@ class EmeiEnv(ABC, Env):
         Give the environment's reflection to single or batch query.
         :param obs: single or batch observations.
         :param action: single or batch action.
-        :return: single or batch (next-obs, reward, done, terminal).
+        :return: single or batch (next-obs, reward, done, info), batch info is a list of dicts.
         """
         if len(obs.shape) == 1:  # single obs
             assert len(action.shape) == 1
             return self.single_query(obs, action)
         else:
-            next_obs_list, reward_list, done_list, info_list = [], [], [], []
-            for i in range(obs.shape[0]):
-                next_obs, reward, done, info = self.single_query(obs[i], action[i])
-                next_obs_list.append(next_obs)
-                reward_list.append(reward)
-                done_list.append(done)
-                info_list.append(info)
-            return np.array(next_obs_list), np.array(reward_list), np.array(done_list), np.array(info_list)
+            batch_size = obs.shape[0]
+            next_obs = np.empty((batch_size,) + self.observation_space.shape, dtype=self.observation_space.dtype)
+            info_list = []
+            self.freeze()
+            try:
+                for i in range(batch_size):
+                    self._set_state_by_obs(obs[i])
+                    next_obs[i] = self._transition(action[i])
+                    info_list.append(self._get_info())
+            finally:  # restore the pre-query state even if a row fails
+                self.unfreeze()
+            reward = self.get_batch_reward_by_next_obs(next_obs, obs, action)
+            done = self.get_batch_terminal_by_next_obs(next_obs, obs, action)
+            return next_obs, reward, done, info_list
 
     @abstractmethod
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
+        """
+        Return the reward of batch next-obs.
+        :param next_obs: batch observations, numpy array or torch tensor.
+        :return: batch reward, with shape (batch_size,).
+        """
         pass
 
     @abstractmethod
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
+        """
+        Return the terminal of batch next-obs.
+        :param next_obs: batch observations, numpy array or torch tensor.
+        :return: batch terminal, with shape (batch_size,).
+        """
         pass
 
+    def get_single_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
+        """
+        Return the reward of single next-obs.
+        :param next_obs: single observation.
+        :return: single reward.
+        """
+        pre_obs = None if pre_obs is None else pre_obs[None]
+        action = None if action is None else action[None]
+        return float(self.get_batch_reward_by_next_obs(next_obs[None], pre_obs, action)[0])
+
+    def get_single_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
+        """
+        Return the terminal of single next-obs.
+        :param next_obs: single observation.
+        :return: single terminal.
+        """
+        pre_obs = None if pre_obs is None else pre_obs[None]
+        action = None if action is None else action[None]
+        return bool(self.get_batch_terminal_by_next_obs(next_obs[None], pre_obs, action)[0])
+
     def get_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
         """
         Return the reward of single or batch next-obs.
-        :param next_obs: single or batch observations.
+        :param next_obs: single or batch observations, numpy array or torch tensor.
         :return: single or batch reward.
         """
         if len(next_obs.shape) == 1:  # single obs
-            next_obs = next_obs.reshape(1, next_obs.shape[0])
-            if pre_obs is not None:
-                pre_obs = pre_obs.reshape(1, pre_obs.shape[0])
-            if action is not None:
-                action = action.reshape(1, action.shape[0])
-            return float(self.get_batch_reward_by_next_obs(next_obs, pre_obs, action)[0, 0])
+            return self.get_single_reward_by_next_obs(next_obs, pre_obs, action)
         else:
             return self.get_batch_reward_by_next_obs(next_obs, pre_obs, action)
 
     def get_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
         """
         Return the terminal of single or batch next-obs.
-        :param next_obs: single or batch observations.
+        :param next_obs: single or batch observations, numpy array or torch tensor.
         :return: single or batch terminal.
         """
         if len(next_obs.shape) == 1:  # single obs
-            next_obs = next_obs.reshape(1, next_obs.shape[0])
-            if pre_obs is not None:
-                pre_obs = pre_obs.reshape(1, pre_obs.shape[0])
-            if action is not None:
-                action = action.reshape(1, action.shape[0])
-            return bool(self.get_batch_terminal_by_next_obs(next_obs, pre_obs, action)[0, 0])
+            return self.get_single_terminal_by_next_obs(next_obs, pre_obs, action)
         else:
             return self.get_batch_terminal_by_next_obs(next_obs, pre_obs, action)
 
@@ -125,21 +171,40 @@ class EmeiEnv(ABC, Env):
     def dataset_names(self):
         return self.offline_dataset_names
 
-    def get_dataset(self, dataset_name):
+    def get_dataset(self, dataset_name, lazy=False):
+        """
+        Return the offline dataset, downloads if it does not exist. On the first full load, the dataset is
+        converted to npy files, and this and every later call return read-only memory-mapped arrays of them; copy
+        an array before modifying it in place. Datasets with object dtype keys (e.g. variable-length strings)
+        can not be memory-mapped, so they are not converted and are returned as writable in-memory arrays, as is
+        a dataset whose conversion failed to write.
+        :param dataset_name: one of dataset_names.
+        :param lazy: if true and not converted yet, keep the h5-file open and only read the rows that are indexed.
+        :return: dict of numpy arrays, or of LazyH5Dataset if lazy.
+        """
         assert dataset_name in self.offline_dataset_names
 
         joint_pos = dataset_name.find("-")
         param, dataset_type = dataset_name[:joint_pos], dataset_name[joint_pos + 1:]
         url = self.data_url[param][dataset_type]
-        h5path = download_dataset_from_url(url)
+        converted_path = converted_path_from_url(url)
 
         data_dict = {}
-        with h5py.File(h5path, 'r') as dataset_file:
-            for k in tqdm(get_keys(dataset_file), desc="load datafile"):
-                try:  # first try loading as an array
-                    data_dict[k] = dataset_file[k][:]
-                except ValueError as e:  # try loading as a scalar
-                    data_dict[k] = dataset_file[k][()]
+        if os.path.isdir(converted_path):
+            data_dict = load_converted_dataset(converted_path)
+        elif lazy:
+            h5path = download_dataset_from_url(url)
+            dataset_file = open_h5_file(h5path)  # closed once all lazy datasets are released
+            for k in get_keys(dataset_file):
+                dataset = dataset_file[k]
+                data_dict[k] = dataset[()] if dataset.shape == () else LazyH5Dataset(dataset)
+        else:
+            h5path = download_dataset_from_url(url)
+            with open_h5_file(h5path) as dataset_file:
+                for k in tqdm(get_keys(dataset_file), desc="load datafile"):
+                    data_dict[k] = read_h5_dataset(dataset_file[k])
+            if convert_dataset(data_dict, converted_path):
+                data_dict = load_converted_dataset(converted_path)  # same read-only arrays as later calls
 
         # Run a few quick sanity checks
         for key in ['observations', 'observations', 'actions', 'rewards', 'terminals', "timeouts"]:
@@ -148,29 +213,95 @@ class EmeiEnv(ABC, Env):
         return data_dict
 
     def get_sequence_dataset(self, dataset_name):
+        """
+        Return the offline dataset split into sequences at terminals and timeouts.
+        :param dataset_name: one of dataset_names.
+        :return: list of dicts, one per sequence. Only per-step keys are included, scalar and metadata keys of
+            other length are left out.
+        """
         dataset = self.get_dataset(dataset_name)
         N = dataset['rewards'].shape[0]
-        data = defaultdict(lambda: defaultdict(list))
+        ends = np.logical_or(dataset['terminals'], dataset['timeouts'])
+        boundaries = np.flatnonzero(ends[:N - 1]) + 1  # last step never opens a new sequence
 
-        sequence_num = 0
-        for i in range(N):
-            done_bool = bool(dataset['terminals'][i])
-            final_timestep = dataset['timeouts'][i]
+        splits = {k: np.split(v, boundaries) for k, v in dataset.items() if np.ndim(v) > 0 and len(v) == N}
+        return [{k: splits[k][i] for k in splits} for i in range(len(boundaries) + 1)]
 
-            for k in dataset:
-                data[sequence_num][k].append(dataset[k][i])
 
-            if done_bool or final_timestep:
-                sequence_num += 1
-        return data
+class LazyH5Dataset:
+    def __init__(self, dataset):
+        """
+        Read-only view of a dataset in h5-file, which only reads the indexed rows from disk.
+        Index arrays are sorted before reading, so that a minibatch touches every chunk at most once.
+        :param dataset: dataset of h5-file.
+        """
+        self.dataset = dataset
+
+    @property
+    def shape(self):
+        return self.dataset.shape
+
+    @property
+    def dtype(self):
+        return self.dataset.dtype
+
+    def __len__(self):
+        return self.dataset.shape[0]
+
+    def __getitem__(self, item):
+        rest = ()
+        if isinstance(item, tuple) and item and isinstance(item[0], (list, np.ndarray)):
+            item, rest = item[0], item[1:]
+        if isinstance(item, (list, np.ndarray)):
+            index = np.asarray(item)
+            if index.dtype == bool:
+                index = np.flatnonzero(index)
+            elif index.size == 0:  # an empty list defaults to float
+                index = index.astype(np.intp)
+            else:
+                index = index.astype(np.intp, casting='same_kind')
+            n = len(self)
+            if ((index < -n) | (index >= n)).any():
+                raise IndexError("Index out of range for dataset of length %d" % n)
+            index = np.where(index < 0, index + n, index)
+            # h5py only accepts increasing indices without duplicates
+            unique_index, inverse = np.unique(index, return_inverse=True)
+            return self.dataset[(unique_index,) + rest][inverse.reshape(index.shape)]
+        return self.dataset[item]
+
+    def __array__(self, dtype=None, copy=None):
+        data = read_h5_dataset(self.dataset)
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+
+def open_h5_file(h5path):
+    """
+    Open h5-file for reading, with enlarged chunk and metadata caches.
+    :param h5path: local file path.
+    :return: h5py file.
+    """
+    h5file = h5py.File(h5path, 'r', libver='latest', rdcc_nbytes=H5_CHUNK_CACHE_BYTES)
+    mdc_config = h5file.id.get_mdc_config()
+    mdc_config.set_initial_size = True
+    mdc_config.initial_size = H5_METADATA_CACHE_BYTES
+    mdc_config.max_size = max(mdc_config.max_size, H5_METADATA_CACHE_BYTES)
+    h5file.id.set_mdc_config(mdc_config)
+    return h5file
+
+
+_KEYS_CACHE = {}
 
 
 def get_keys(h5file):
     """
-    Get the keys of h5-file.
+    Get the keys of h5-file, cached by file path and modification time.
     :param h5file: binary file of h5 format.
     :return: keys.
     """
+    cache_key = (os.path.abspath(h5file.filename), os.path.getmtime(h5file.filename))
+    if cache_key in _KEYS_CACHE:
+        return _KEYS_CACHE[cache_key]
+
     keys = []
 
     def visitor(name, item):
@@ -178,9 +309,33 @@ def get_keys(h5file):
             keys.append(name)
 
     h5file.visititems(visitor)
+    _KEYS_CACHE[cache_key] = keys
     return keys
 
 
+def read_h5_dataset(dataset):
+    """
+    Read the whole h5-dataset into memory. Chunked datasets larger than the chunk cache are read in blocks of
+    whole chunk rows that fill the cache, smaller ones at once.
+    :param dataset: dataset of h5-file.
+    :return: numpy array, or scalar for scalar dataset.
+    """
+    if dataset.shape == ():  # scalar
+        return dataset[()]
+    data = np.empty(dataset.shape, dtype=dataset.dtype)
+    if dataset.chunks is None or data.nbytes <= H5_CHUNK_CACHE_BYTES:  # read at once
+        if data.size:
+            dataset.read_direct(data)
+        return data
+    chunk_rows = dataset.chunks[0]
+    row_bytes = data.nbytes // dataset.shape[0]
+    block_rows = max(H5_CHUNK_CACHE_BYTES // row_bytes // chunk_rows, 1) * chunk_rows
+    for start in range(0, dataset.shape[0], block_rows):
+        block = np.s_[start:start + block_rows]
+        dataset.read_direct(data, block, block)
+    return data
+
+
 def filepath_from_url(dataset_url: str) -> str:
     """
     Return the data file path corresponding to the url.
@@ -193,16 +348,261 @@ def filepath_from_url(dataset_url: str) -> str:
     return dataset_filepath
 
 
+def converted_path_from_url(dataset_url: str) -> str:
+    """
+    Return the directory of npy files converted from the data file of the url.
+    :param dataset_url: web url.
+    :return: local directory path.
+    """
+    dataset_filepath = filepath_from_url(dataset_url)
+    dataset_dir, dataset_name = os.path.split(dataset_filepath)
+    return os.path.join(dataset_dir, "converted", os.path.splitext(dataset_name)[0])
+
+
+def convert_dataset(data_dict: dict, converted_path: str) -> bool:
+    """
+    Save every key of dataset as a npy file. The keys are written into a private temporary directory, which is
+    only renamed to converted_path once complete, so concurrent conversions of the same dataset do not interfere.
+    :param data_dict: dataset loaded from h5-file.
+    :param converted_path: local directory path.
+    :return: true if the converted directory exists afterwards. False if the dataset has object dtype keys,
+        which can not be memory-mapped and are not converted, or if writing failed (e.g. disk full).
+    """
+    if any(np.asarray(data).dtype.hasobject for data in data_dict.values()):
+        return False
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(converted_path), exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=os.path.dirname(converted_path))
+        for k in tqdm(data_dict, desc="convert datafile"):
+            npy_path = os.path.join(tmp_path, *k.split('/')) + ".npy"
+            os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+            np.save(npy_path, data_dict[k])
+        os.replace(tmp_path, converted_path)
+        return True
+    except OSError:  # converted by another process first, or could not write
+        if tmp_path is not None:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return os.path.isdir(converted_path)
+
+
+def load_converted_dataset(converted_path: str) -> dict:
+    """
+    Memory-map the npy files of converted dataset.
+    :param converted_path: local directory path.
+    :return: dict of read-only memory-mapped arrays, and scalars.
+    """
+    data_dict = {}
+    for root, _, filenames in os.walk(converted_path):
+        for filename in filenames:
+            npy_path = os.path.join(root, filename)
+            k = os.path.relpath(npy_path, converted_path)[:-len(".npy")].replace(os.sep, '/')
+            data = np.load(npy_path, mmap_mode='r')
+            data_dict[k] = data[()] if data.shape == () else data
+    return data_dict
+
+
+def download_range(url: str, part_path: str, start: int, end: int, size: int, etag: str, pbar: tqdm) -> None:
+    """
+    Download bytes [start, end] of url into part file, resuming from the bytes already in it.
+    A connection closed early or reset is retried from where it stopped, up to DOWNLOAD_RETRIES times.
+    Every response must carry exactly the requested range of a file of the given size; with an ETag the
+    request is conditional, so a server whose file changed answers with the whole file, which is rejected.
+    :param url: web url.
+    :param part_path: local path of the part file.
+    :param start: first byte of the range.
+    :param end: last byte of the range.
+    :param size: size of the whole file.
+    :param etag: ETag of the file, None if the server sends none.
+    :param pbar: progress bar shared by all ranges.
+    :return: None
+    """
+    length = end - start + 1
+    if os.path.exists(part_path) and os.path.getsize(part_path) > length:  # corrupt part
+        os.remove(part_path)
+    done = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    pbar.update(done)
+    error = None
+    for _ in range(DOWNLOAD_RETRIES):
+        if done == length:
+            return
+        headers = {"Range": "bytes={}-{}".format(start + done, end)}
+        if etag is not None and not etag.startswith("W/"):  # weak ETags are not allowed in If-Range
+            headers["If-Range"] = etag
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response, \
+                    open(part_path, 'ab') as part_file:
+                if response.status != 206:
+                    raise IOError("Server does not support range requests, or %s changed" % url)
+                content_range = response.headers.get("Content-Range", "")
+                match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range.strip())
+                if match is None or match.group(1, 2) != (str(start + done), str(end)) \
+                        or match.group(3) not in (str(size), "*"):
+                    raise IOError("Unexpected Content-Range %r for range %d-%d of %s" % (
+                        content_range, start + done, end, url))
+                while True:
+                    block = response.read(DOWNLOAD_BLOCK_BYTES)
+                    if not block:  # http.client returns b'' instead of raising when the server closes early
+                        break
+                    part_file.write(block)
+                    pbar.update(len(block))
+        except (ConnectionError, http.client.IncompleteRead) as e:  # keep the bytes written before it
+            error = e
+        done = os.path.getsize(part_path)
+    if done != length:
+        raise IOError("Downloaded %d of %d bytes in range %d-%d of %s" % (done, length, start, end, url)) from error
+
+
+def remove_stale_parts(part_path: str, range_paths: list, record: dict) -> None:
+    """
+    Remove the part files of an interrupted download that are not among range_paths, or all of them if the
+    remote file changed since, as told by its size and ETag recorded beside them.
+    :param part_path: local path of the joined part file.
+    :param range_paths: local paths of the part files of the current split.
+    :param record: size and ETag of the remote file.
+    :return: None
+    """
+    record_path = part_path + ".json"
+    try:
+        with open(record_path, 'r') as record_file:
+            changed = json.load(record_file) != record
+    except (OSError, ValueError):  # no or unreadable record
+        changed = True
+    part_dir, part_name = os.path.split(part_path)
+    for name in os.listdir(part_dir):
+        path = os.path.join(part_dir, name)
+        if name.startswith(part_name) and path != record_path and (changed or path not in range_paths):
+            os.remove(path)
+    with open(record_path, 'w') as record_file:
+        json.dump(record, record_file)
+
+
+def check_download_size(part_path: str, size: int, url: str) -> None:
+    """
+    Check the downloaded part file against the size announced by the server, removes it if they differ.
+    :param part_path: local path of the part file.
+    :param size: announced size, 0 if unknown.
+    :param url: web url.
+    :return: None
+    """
+    part_size = os.path.getsize(part_path)
+    if size and part_size != size:
+        os.remove(part_path)
+        raise IOError("Downloaded %d of %d bytes of %s" % (part_size, size, url))
+
+
+def download_file(url: str, filepath: str, workers: int = DOWNLOAD_WORKERS) -> None:
+    """
+    Download url to filepath over several ranged connections. Finished bytes of every range are kept in
+    part files beside filepath, named by their byte range, so an interrupted download resumes where it
+    stopped, unless the remote file changed its size or ETag since. The file only appears at filepath
+    once it is complete.
+    :param url: web url.
+    :param filepath: local file path.
+    :param workers: number of parallel connections.
+    :return: None
+    """
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method="HEAD")) as response:
+            size = int(response.headers.get("Content-Length", 0))
+            accept_ranges = response.headers.get("Accept-Ranges", "none") == "bytes"
+            etag = response.headers.get("ETag")
+    except urllib.error.HTTPError:  # server rejects HEAD
+        size, accept_ranges, etag = 0, False, None
+    part_path = filepath + ".part"
+    if not accept_ranges or size == 0:  # server can not split, fall back to single stream
+        urllib.request.urlretrieve(url, part_path)  # raises ContentTooShortError on a short body
+        check_download_size(part_path, size, url)
+        os.replace(part_path, filepath)
+        return
+
+    workers = min(workers, size)
+    bounds = [size * i // workers for i in range(workers + 1)]
+    range_paths = ["{}.{}-{}".format(part_path, bounds[i], bounds[i + 1] - 1) for i in range(workers)]
+    remove_stale_parts(part_path, range_paths, {"size": size, "etag": etag})
+    with tqdm(total=size, unit='B', unit_scale=True, desc="download datafile") as pbar, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(download_range, url, range_paths[i], bounds[i], bounds[i + 1] - 1, size, etag,
+                                   pbar) for i in range(workers)]
+        for future in futures:
+            future.result()
+
+    with open(part_path, 'wb') as part_file:
+        for range_path in range_paths:
+            with open(range_path, 'rb') as range_file:
+                shutil.copyfileobj(range_file, part_file)
+    check_download_size(part_path, size, url)
+    os.replace(part_path, filepath)
+    for range_path in range_paths:
+        os.remove(range_path)
+    os.remove(part_path + ".json")
+
+
+def file_digest(filepath: str) -> str:
+    """
+    Return the 64-bit blake2b digest of file content.
+    :param filepath: local file path.
+    :return: hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(DOWNLOAD_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_digest(filepath: str, digest: str = None) -> None:
+    """
+    Write size, modification time and digest of the local file beside it.
+    :param filepath: local file path.
+    :param digest: digest of the file if already known, hashed otherwise.
+    :return: None
+    """
+    stat = os.stat(filepath)
+    digest = file_digest(filepath) if digest is None else digest
+    with open(filepath + DIGEST_SUFFIX, 'w') as digest_file:
+        json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}, digest_file)
+
+
+def is_valid_cache(filepath: str) -> bool:
+    """
+    Check the local file against the digest written beside it after download. The file is only hashed again
+    if its size or modification time changed since the digest was written.
+    :param filepath: local file path.
+    :return: false if the file or its digest is missing, or they do not match.
+    """
+    digest_path = filepath + DIGEST_SUFFIX
+    if not os.path.exists(filepath) or not os.path.exists(digest_path):
+        return False
+    try:
+        with open(digest_path, 'r') as digest_file:
+            record = json.load(digest_file)
+    except ValueError:  # unreadable digest
+        return False
+    stat = os.stat(filepath)
+    if stat.st_size != record["size"]:
+        return False
+    if stat.st_mtime_ns == record["mtime_ns"]:
+        return True
+    digest = file_digest(filepath)
+    if digest != record["digest"]:
+        return False
+    write_digest(filepath, digest)  # content unchanged, only touched
+    return True
+
+
 def download_dataset_from_url(dataset_url: str) -> str:
     """
-    Return the data file path corresponding to the url, downloads if it does not exist.
+    Return the data file path corresponding to the url, downloads if it does not exist or fails verification.
     :param dataset_url: web url.
     :return: local file path.
     """
     dataset_filepath = filepath_from_url(dataset_url)
-    if not os.path.exists(dataset_filepath):
+    if not is_valid_cache(dataset_filepath):
         print('Downloading dataset:', dataset_url, 'to', dataset_filepath)
-        urllib.request.urlretrieve(dataset_url, dataset_filepath)
+        download_file(dataset_url, dataset_filepath)
+        shutil.rmtree(converted_path_from_url(dataset_url), ignore_errors=True)  # stale conversion
+        write_digest(dataset_filepath)  # only reached once download_file verified the size
     if not os.path.exists(dataset_filepath):
         raise IOError("Failed to download dataset from %s" % dataset_url)
     return dataset_filepath
@@ -53,14 +53,16 @@ class BaseControlEnv(EmeiEnv):
     def update_state(self, updated):
         self.state += updated * (self.time_step / self.freq_rate)
 
-    def step(self, action: Union[int, np.ndarray]):
+    def _transition(self, action: Union[int, np.ndarray]):
         extracted_action = self._extract_action(action)
         for i in range(self.freq_rate):
             updated = self._get_update_info(extracted_action)
             self.update_state(updated)
+        return self._get_obs(self.state)
 
-        obs = self._get_obs(self.state)
-        return obs, self.get_reward_by_next_obs(obs), self.get_terminal_by_next_obs(obs), {}
+    def step(self, action: Union[int, np.ndarray]):
+        obs = self._transition(action)
+        return obs, self.get_single_reward_by_next_obs(obs), self.get_single_terminal_by_next_obs(obs), self._get_info()
 
     def reset(
             self,
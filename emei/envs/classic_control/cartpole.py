@@ -110,10 +110,10 @@ class CartPoleHoldingEnv(BaseCartPoleEnv):
 
     def get_batch_terminal_by_next_obs(self, next_obs):
         notdone = (np.abs(next_obs[:, 2]) < self.theta_threshold_radians) & (np.abs(next_obs[:, 0]) < self.x_threshold)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        return np.logical_not(notdone)
 
     def get_batch_reward_by_next_obs(self, next_obs):
-        return np.ones([next_obs.shape[0], 1])
+        return np.ones(next_obs.shape[0])
 
     def _get_initial_state(self):
         return self.np_random.uniform(low=-0.05, high=0.05, size=(4,))
@@ -130,11 +130,11 @@ class CartPoleSwingUpEnv(BaseCartPoleEnv):
 
     def get_batch_terminal_by_next_obs(self, next_obs):
         notdone = (np.abs(next_obs[:, 0]) < self.x_threshold)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        return np.logical_not(notdone)
 
     def get_batch_reward_by_next_obs(self, next_obs):
         rewards = (np.cos(next_obs[:, 2]) + 1) / 2
-        return rewards.reshape([next_obs.shape[0], 1])
+        return rewards
 
     def _get_initial_state(self):
         init_state = self.np_random.uniform(low=-0.05, high=0.05, size=(4,)) + [0, 0, np.pi, 0]
@@ -152,10 +152,10 @@ class ContinuousCartPoleHoldingEnv(BaseCartPoleEnv):
 
     def get_batch_terminal_by_next_obs(self, next_obs):
         notdone = (np.abs(next_obs[:, 2]) < self.theta_threshold_radians) & (np.abs(next_obs[:, 0]) < self.x_threshold)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        return np.logical_not(notdone)
 
     def get_batch_reward_by_next_obs(self, next_obs):
-        return np.ones([next_obs.shape[0], 1])
+        return np.ones(next_obs.shape[0])
 
     def _get_initial_state(self):
         return self.np_random.uniform(low=-0.05, high=0.05, size=(4,))
@@ -173,11 +173,11 @@ class ContinuousCartPoleSwingUpEnv(BaseCartPoleEnv):
 
     def get_batch_terminal_by_next_obs(self, next_obs):
         notdone = (np.abs(next_obs[:, 0]) < self.x_threshold)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        return np.logical_not(notdone)
 
     def get_batch_reward_by_next_obs(self, next_obs):
         rewards = (np.cos(next_obs[:, 2]) + 1) / 2
-        return rewards.reshape([next_obs.shape[0], 1])
+        return rewards
 
     def _get_initial_state(self):
         init_state = self.np_random.uniform(low=-0.05, high=0.05, size=(4,)) + [0, 0, np.pi, 0]
@@ -2,6 +2,7 @@ import numpy as np
 
 from gym import utils
 from emei.envs.mujoco.base_mujoco import BaseMujocoEnv
+from emei.util import get_array_module
 
 DEFAULT_CAMERA_CONFIG = {
     "distance": 4.0,
@@ -43,16 +44,18 @@ class AntRunningEnv(BaseMujocoEnv, utils.EzPickle):
                                )
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
+        xp = get_array_module(next_obs)
         forward_reward = self._forward_reward_weight * (next_obs[:, 0] - pre_obs[:, 0]) / self.time_step
-        control_cost = self._ctrl_cost_weight * np.sum(np.square(action))
+        control_cost = self._ctrl_cost_weight * xp.einsum('ij,ij->i', action, action)
         rewards = self._healthy_reward + forward_reward - control_cost
-        return rewards.reshape([next_obs.shape[0], 1])
+        return rewards
 
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
+        xp = get_array_module(next_obs)
         min_z, max_z = self._healthy_z_range
         z = next_obs[:, 2]
-        notdone = np.logical_and(z > min_z, z < max_z) & np.isfinite(next_obs).all(axis=1)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        notdone = xp.logical_and(z > min_z, z < max_z) & xp.isfinite(next_obs).all(axis=1)
+        return xp.logical_not(notdone, out=notdone)
 
 
 if __name__ == '__main__':
@@ -123,16 +123,16 @@ class BaseMujocoEnv(EmeiEnv):
     def _get_obs(self):
         return np.concatenate([self.data.qpos, self.data.qvel]).ravel()
 
-    def _get_info(self):
-        return {}
+    def _transition(self, action):
+        self.do_simulation(action, self.freq_rate)
+        return self._get_obs()
 
     def step(self, action):
         pre_obs = self._get_obs()
-        self.do_simulation(action, self.freq_rate)
-        obs = self._get_obs()
+        obs = self._transition(action)
         return obs, \
-               self.get_reward_by_next_obs(obs, pre_obs, action), \
-               self.get_terminal_by_next_obs(obs, pre_obs, action), \
+               self.get_single_reward_by_next_obs(obs, pre_obs, action), \
+               self.get_single_terminal_by_next_obs(obs, pre_obs, action), \
                self._get_info()
 
     def _set_action_space(self):
@@ -190,8 +190,8 @@ class BaseMujocoEnv(EmeiEnv):
 
     def set_state(self, qpos, qvel):
         assert qpos.shape == (self.model.nq,) and qvel.shape == (self.model.nv,)
-        self.data.qpos[:] = np.copy(qpos)
-        self.data.qvel[:] = np.copy(qvel)
+        self.data.qpos[:] = qpos
+        self.data.qvel[:] = qvel
         if self.model.na == 0:
             self.data.act[:] = None
         mujoco.mj_forward(self.model, self.data)
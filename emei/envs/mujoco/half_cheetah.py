@@ -4,6 +4,7 @@ import numpy as np
 
 from gym import utils
 from emei.envs.mujoco.base_mujoco import BaseMujocoEnv
+from emei.util import get_array_module
 
 DEFAULT_CAMERA_CONFIG = {
     "distance": 4.0,
@@ -39,14 +40,16 @@ class HalfCheetahRunningEnv(BaseMujocoEnv, utils.EzPickle):
                                )
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        forward_reward = self._forward_reward_weight * (next_obs[:, 0] - pre_obs[:, 0]) / self.time_step
-        control_cost = self._ctrl_cost_weight * np.sum(np.square(action))
-        rewards = forward_reward - control_cost
-        return rewards.reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        rewards = next_obs[:, 0] - pre_obs[:, 0]
+        rewards *= self._forward_reward_weight / self.time_step
+        rewards -= self._ctrl_cost_weight * xp.einsum('ij,ij->i', action, action)
+        return rewards
 
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        notdone = np.isfinite(next_obs).all(axis=1)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        return xp.logical_not(notdone, out=notdone)
 
 
 if __name__ == '__main__':
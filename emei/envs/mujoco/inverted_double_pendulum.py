@@ -1,6 +1,7 @@
 import numpy as np
 from gym import utils
 from emei.envs.mujoco.base_mujoco import BaseMujocoEnv
+from emei.util import get_array_module
 
 DEFAULT_CAMERA_CONFIG = {
     "trackbodyid": 0,
@@ -9,6 +10,31 @@ DEFAULT_CAMERA_CONFIG = {
 }
 
 
+def tip_height(next_obs):
+    """
+    Height of the second pole's tip, in units of pole length.
+    :param next_obs: batch next-observations.
+    :return: batch height, with shape (batch_size,).
+    """
+    xp = get_array_module(next_obs)
+    theta1 = next_obs[:, 1]
+    height = xp.cos(theta1)
+    height += xp.cos(theta1 + next_obs[:, 2])  # no out=, torch autograd rejects it
+    return height
+
+
+def swing_up_reward(next_obs):
+    """
+    Reward of double pendulum swing-up, computed in place on the tip height.
+    :param next_obs: batch next-observations.
+    :return: batch reward, with shape (batch_size,).
+    """
+    rewards = tip_height(next_obs)
+    rewards *= -0.25
+    rewards += 0.5
+    return rewards
+
+
 class BaseInvertedDoublePendulumEnv(BaseMujocoEnv, utils.EzPickle):
     def __init__(self,
                  freq_rate: int = 1,
@@ -25,6 +51,9 @@ class BaseInvertedDoublePendulumEnv(BaseMujocoEnv, utils.EzPickle):
                                reset_noise_scale=reset_noise_scale, )
         utils.EzPickle.__init__(self)
 
+    def _update_model(self):
+        self._x_left, self._x_right = float(self.model.jnt_range[0][0]), float(self.model.jnt_range[0][1])
+
     @property
     def causal_graph(self):
         return np.array([[0, 0, 0, 1, 0, 0, 0],  # dot x
@@ -47,13 +76,14 @@ class ReboundInvertedDoublePendulumBalancingEnv(BaseInvertedDoublePendulumEnv):
                                                integrator=integrator)
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        return np.ones([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        return xp.ones_like(next_obs[:, 0])
 
     def get_batch_terminal_by_next_obs(self, next_obs, pred_obs=None, action=None):
-        x, theta1, theta2, v, omega1, omega2 = next_obs.T
-        y = np.cos(theta1) + np.cos(theta1 + theta2)
-        notdone = np.isfinite(next_obs).all(axis=1) & (y > 1.5)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        notdone &= tip_height(next_obs) > 1.5
+        return xp.logical_not(notdone, out=notdone)
 
 
 class BoundaryInvertedDoublePendulumBalancingEnv(BaseInvertedDoublePendulumEnv):
@@ -67,16 +97,20 @@ class BoundaryInvertedDoublePendulumBalancingEnv(BaseInvertedDoublePendulumEnv):
                                                integrator=integrator)
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        return np.ones([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        return xp.ones_like(next_obs[:, 0])
 
     def get_batch_terminal_by_next_obs(self, next_obs, pred_obs=None, action=None):
-        x_left, x_right = self.model.jnt_range[0]
-        x, theta1, theta2, v, omega1, omega2 = next_obs.T
-        y = np.cos(theta1) + np.cos(theta1 + theta2)
-        notdone = np.isfinite(next_obs).all(axis=1) \
-                  & (y > 1.5) \
-                  & np.logical_and(x_left < x, x < x_right)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        x = next_obs[:, 0]
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        check = xp.greater(tip_height(next_obs), 1.5)
+        notdone &= check
+        xp.greater(x, self._x_left, out=check)
+        notdone &= check
+        xp.less(x, self._x_right, out=check)
+        notdone &= check
+        return xp.logical_not(notdone, out=notdone)
 
 
 class ReboundInvertedDoublePendulumSwingUpEnv(BaseInvertedDoublePendulumEnv):
@@ -95,16 +129,15 @@ class ReboundInvertedDoublePendulumSwingUpEnv(BaseInvertedDoublePendulumEnv):
         self.model.jnt_range[0] = [-3, 3]
         self.model.jnt_range[1] = [-np.inf, np.inf]
         self.model.body_quat[2] = [0, 0, 1, 0]
+        super(ReboundInvertedDoublePendulumSwingUpEnv, self)._update_model()
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        x, theta1, theta2, v, omega1, omega2 = next_obs.T
-        y = np.cos(theta1) + np.cos(theta1 + theta2)
-        rewards = (2 - y) / 4
-        return rewards.reshape([next_obs.shape[0], 1])
+        return swing_up_reward(next_obs)
 
     def get_batch_terminal_by_next_obs(self, next_obs, pred_obs=None, action=None):
-        notdone = np.isfinite(next_obs).all(axis=1)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        return xp.logical_not(notdone, out=notdone)
 
     @property
     def causal_graph(self):
@@ -129,19 +162,20 @@ class BoundaryInvertedDoublePendulumSwingUpEnv(BaseInvertedDoublePendulumEnv):
         self.model.jnt_range[0] = [-3, 3]
         self.model.jnt_range[1] = [-np.inf, np.inf]
         self.model.body_quat[2] = [0, 0, 1, 0]
+        super(BoundaryInvertedDoublePendulumSwingUpEnv, self)._update_model()
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        x, theta1, theta2, v, omega1, omega2 = next_obs.T
-        y = np.cos(theta1) + np.cos(theta1 + theta2)
-        rewards = (2 - y) / 4
-        return rewards.reshape([next_obs.shape[0], 1])
+        return swing_up_reward(next_obs)
 
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        x_left, x_right = self.model.jnt_range[0]
-        x, theta1, theta2, v, omega1, omega2 = next_obs.T
-        notdone = np.isfinite(next_obs).all(axis=1) \
-                  & np.logical_and(x_left < x, x < x_right)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        x = next_obs[:, 0]
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        check = xp.greater(x, self._x_left)
+        notdone &= check
+        xp.less(x, self._x_right, out=check)
+        notdone &= check
+        return xp.logical_not(notdone, out=notdone)
 
     @property
     def causal_graph(self):
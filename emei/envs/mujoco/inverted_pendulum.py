@@ -1,10 +1,24 @@
 import numpy as np
 from gym import utils
 from emei.envs.mujoco.base_mujoco import BaseMujocoEnv
+from emei.util import get_array_module
 
 DEFAULT_CAMERA_CONFIG = {}
 
 
+def swing_up_reward(next_obs):
+    """
+    Reward of pendulum swing-up, computed in one buffer.
+    :param next_obs: batch next-observations.
+    :return: batch reward, with shape (batch_size,).
+    """
+    xp = get_array_module(next_obs)
+    rewards = xp.cos(next_obs[:, 1])
+    rewards *= -0.5
+    rewards += 0.5
+    return rewards
+
+
 class BaseInvertedPendulumEnv(BaseMujocoEnv, utils.EzPickle):
     def __init__(self,
                  freq_rate: int = 1,
@@ -21,6 +35,9 @@ class BaseInvertedPendulumEnv(BaseMujocoEnv, utils.EzPickle):
                                camera_config=DEFAULT_CAMERA_CONFIG,
                                reset_noise_scale=reset_noise_scale, )
 
+    def _update_model(self):
+        self._x_left, self._x_right = float(self.model.jnt_range[0][0]), float(self.model.jnt_range[0][1])
+
     @property
     def causal_graph(self):
         return np.array([[0, 0, 1, 0, 0],  # dot x
@@ -44,11 +61,14 @@ class ReboundInvertedPendulumBalancingEnv(BaseInvertedPendulumEnv):
                                          reset_noise_scale=reset_noise_scale)
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        return np.ones([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        return xp.ones_like(next_obs[:, 0])
 
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        notdone = (np.abs(next_obs[:, 1]) <= 0.2) & np.isfinite(next_obs).all(axis=1)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        notdone &= xp.abs(next_obs[:, 1]) <= 0.2
+        return xp.logical_not(notdone, out=notdone)
 
 
 class BoundaryInvertedPendulumBalancingEnv(BaseInvertedPendulumEnv):
@@ -65,14 +85,20 @@ class BoundaryInvertedPendulumBalancingEnv(BaseInvertedPendulumEnv):
                                          reset_noise_scale=reset_noise_scale)
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        return np.ones([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        return xp.ones_like(next_obs[:, 0])
 
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        x_left, x_right = self.model.jnt_range[0]
-        notdone = (np.abs(next_obs[:, 1]) <= 0.2) \
-                  & np.logical_and(x_left < next_obs[:, 0], next_obs[:, 0] < x_right) \
-                  & np.isfinite(next_obs).all(axis=1)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        x = next_obs[:, 0]
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        check = xp.less_equal(xp.abs(next_obs[:, 1]), 0.2)
+        notdone &= check
+        xp.greater(x, self._x_left, out=check)
+        notdone &= check
+        xp.less(x, self._x_right, out=check)
+        notdone &= check
+        return xp.logical_not(notdone, out=notdone)
 
 
 class ReboundInvertedPendulumSwingUpEnv(BaseInvertedPendulumEnv):
@@ -94,14 +120,15 @@ class ReboundInvertedPendulumSwingUpEnv(BaseInvertedPendulumEnv):
         self.model.jnt_range[0] = [-2, 2]
         self.model.jnt_range[1] = [-np.inf, np.inf]
         self.model.body_quat[2] = [0, 0, 1, 0]
+        super(ReboundInvertedPendulumSwingUpEnv, self)._update_model()
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        rewards = (1 - np.cos(next_obs[:, 1])) / 2
-        return rewards.reshape([next_obs.shape[0], 1])
+        return swing_up_reward(next_obs)
 
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        notdone = np.isfinite(next_obs).all(axis=1)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        return xp.logical_not(notdone, out=notdone)
 
     @property
     def causal_graph(self):
@@ -129,16 +156,20 @@ class BoundaryInvertedPendulumSwingUpEnv(BaseInvertedPendulumEnv):
         self.model.jnt_range[0] = [-2, 2]
         self.model.jnt_range[1] = [-np.inf, np.inf]
         self.model.body_quat[2] = [0, 0, 1, 0]
+        super(BoundaryInvertedPendulumSwingUpEnv, self)._update_model()
 
     def get_batch_reward_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        rewards = (1 - np.cos(next_obs[:, 1])) / 2
-        return rewards.reshape([next_obs.shape[0], 1])
+        return swing_up_reward(next_obs)
 
     def get_batch_terminal_by_next_obs(self, next_obs, pre_obs=None, action=None):
-        x_left, x_right = self.model.jnt_range[0]
-        notdone = np.logical_and(x_left < next_obs[:, 0], next_obs[:, 0] < x_right) \
-                  & np.isfinite(next_obs).all(axis=1)
-        return np.logical_not(notdone).reshape([next_obs.shape[0], 1])
+        xp = get_array_module(next_obs)
+        x = next_obs[:, 0]
+        notdone = xp.isfinite(next_obs).all(axis=1)
+        check = xp.greater(x, self._x_left)
+        notdone &= check
+        xp.less(x, self._x_right, out=check)
+        notdone &= check
+        return xp.logical_not(notdone, out=notdone)
 
     @property
     def causal_graph(self):
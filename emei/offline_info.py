@@ -15,3 +15,9 @@ for env_name in ENV_NAMES:
         for dataset in DATASETS:
             URL_INFOS[env_name][param][dataset] = "{}/{}-v0/{}/{}.h5".format(
                 ROOT_PATH, env_name, param, dataset)
+
+DATASET_NAMES = {}
+for env_name in URL_INFOS:
+    DATASET_NAMES[env_name] = ["{}-{}".format(param, dataset)
+                               for param in URL_INFOS[env_name]
+                               for dataset in URL_INFOS[env_name][param]]
@@ -1,5 +1,21 @@
+import sys
 import time
 
+import numpy as np
+
+
+def get_array_module(array):
+    """
+    Return the array library of given array, so that batch kernels also run on torch tensors without copying.
+    Torch is only looked up if it has already been imported, so it is not a requirement of emei.
+    :param array: numpy array or torch tensor.
+    :return: torch module for tensors, otherwise numpy module.
+    """
+    torch = sys.modules.get("torch")
+    if torch is not None and isinstance(array, torch.Tensor):
+        return torch
+    return np
+
 
 def random_policy_test(env, is_render=False, sleep=None, default_action=None):
     def render():